@@ -1,20 +1,117 @@
+import atexit
 import ctypes
-import time
+import threading
 from ctypes import wintypes
 
-# CLSIDs / IIDs from Windows Location API
-CLSID_Location = ctypes.GUID("{E5B8E079-EE6D-4E33-A438-C87F2E959254}")
-IID_ILocation  = ctypes.GUID("{AB2ECE69-56D9-4F28-B525-DE1B0EE44237}")
-IID_ILocationReport = ctypes.GUID("{C8B7F7EE-75D0-4DB9-B62D-7A0F369CA456}")
+# CLSIDs / IIDs from Windows Location API, as their raw 16-byte in-memory layout
+# (Data1..Data3 little-endian, Data4 as-is)
+GUID = ctypes.c_ubyte * 16
 
-# LocationReportType_LatLong = 0
-REPORT_TYPE_LATLONG = 0
+# {E5B8E079-EE6D-4E33-A438-C87F2E959254}
+CLSID_Location = GUID.from_buffer_copy(b"\x79\xe0\xb8\xe5\x6d\xee\x33\x4e\xa4\x38\xc8\x7f\x2e\x95\x92\x54")
+# {AB2ECE69-56D9-4F28-B525-DE1B0EE44237}
+IID_ILocation = GUID.from_buffer_copy(b"\x69\xce\x2e\xab\xd9\x56\x28\x4f\xb5\x25\xde\x1b\x0e\xe4\x42\x37")
+# {C8B7F7EE-75D0-4DB9-B62D-7A0F369CA456}
+IID_ILocationReport = GUID.from_buffer_copy(b"\xee\xf7\xb7\xc8\xd0\x75\xb9\x4d\xb6\x2d\x7a\x0f\x36\x9c\xa4\x56")
+# {7FED806D-0EF8-4F07-80AC-36A0BEAE3134}
+IID_ILatLongReport = GUID.from_buffer_copy(b"\x6d\x80\xed\x7f\xf8\x0e\x07\x4f\x80\xac\x36\xa0\xbe\xae\x31\x34")
+# {CAE02BBF-798B-4508-A207-35A7906DC73D}
+IID_ILocationEvents = GUID.from_buffer_copy(b"\xbf\x2b\xe0\xca\x8b\x79\x08\x45\xa2\x07\x35\xa7\x90\x6d\xc7\x3d")
+# {00000000-0000-0000-C000-000000000046}
+IID_IUnknown = GUID.from_buffer_copy(b"\x00\x00\x00\x00\x00\x00\x00\x00\xc0\x00\x00\x00\x00\x00\x00\x46")
+
+# REFCLSID/REFIID arguments, built once
+_p_CLSID_Location = ctypes.cast(CLSID_Location, ctypes.c_void_p)
+_p_IID_ILocation = ctypes.cast(IID_ILocation, ctypes.c_void_p)
+_p_IID_ILatLongReport = ctypes.cast(IID_ILatLongReport, ctypes.c_void_p)
+
+# Interfaces the event sink answers QueryInterface for
+_EVENTS_IIDS = frozenset((bytes(IID_IUnknown), bytes(IID_ILocationEvents)))
 
 # Accuracy flags
 LOCATION_DESIRED_ACCURACY_HIGH = 1
 
-# Initialize COM
-ctypes.windll.ole32.CoInitialize(None)
+# LOCATION_REPORT_STATUS values that mean no fix is coming
+REPORT_NOT_SUPPORTED = 0
+REPORT_ERROR = 1
+REPORT_ACCESS_DENIED = 2
+
+REPORT_STATUS_ERRORS = {
+    REPORT_NOT_SUPPORTED: "Location reports are not supported on this machine",
+    REPORT_ERROR: "Location sensor reported an error",
+    REPORT_ACCESS_DENIED: "Location access denied (check Windows location privacy settings)",
+}
+
+S_OK = 0
+E_NOINTERFACE = -2147467262  # 0x80004002
+RPC_E_CHANGED_MODE = -2147417850  # 0x80010106
+
+COINIT_MULTITHREADED = 0x0
+
+FIX_TIMEOUT_MS = 15000
+
+# Win32 / COM prototypes
+LPCGUID = ctypes.c_void_p
+HRESULT = ctypes.c_long  # plain int so callers can inspect failures themselves
+
+_kernel32 = ctypes.windll.kernel32
+_ole32 = ctypes.windll.ole32
+
+CreateEventW = _kernel32.CreateEventW
+CreateEventW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+CreateEventW.restype = wintypes.HANDLE
+SetEvent = _kernel32.SetEvent
+SetEvent.argtypes = [wintypes.HANDLE]
+SetEvent.restype = wintypes.BOOL
+CloseHandle = _kernel32.CloseHandle
+CloseHandle.argtypes = [wintypes.HANDLE]
+CloseHandle.restype = wintypes.BOOL
+
+CoInitializeEx = _ole32.CoInitializeEx
+CoInitializeEx.argtypes = [wintypes.LPVOID, wintypes.DWORD]
+CoInitializeEx.restype = HRESULT
+CoUninitialize = _ole32.CoUninitialize
+CoUninitialize.argtypes = []
+CoUninitialize.restype = None
+CoCreateInstance = _ole32.CoCreateInstance
+CoCreateInstance.argtypes = [LPCGUID, wintypes.LPVOID, wintypes.DWORD, LPCGUID, ctypes.POINTER(ctypes.c_void_p)]
+CoCreateInstance.restype = HRESULT
+CoWaitForMultipleHandles = _ole32.CoWaitForMultipleHandles
+CoWaitForMultipleHandles.argtypes = [
+    wintypes.DWORD, wintypes.DWORD, wintypes.ULONG, ctypes.POINTER(wintypes.HANDLE), ctypes.POINTER(wintypes.DWORD),
+]
+CoWaitForMultipleHandles.restype = HRESULT
+
+# COM is initialized lazily, once per thread (see ensure_com)
+_com = threading.local()
+
+
+def ensure_com():
+    """
+    Join the multithreaded apartment on the calling thread, once. The main thread
+    is uninitialized at exit; a worker thread must call release_com() before it returns.
+    """
+    if getattr(_com, "inited", False):
+        return
+    hr = CoInitializeEx(None, COINIT_MULTITHREADED)
+    if hr == RPC_E_CHANGED_MODE:
+        # Thread already lives in an STA owned by someone else; COM is usable, nothing to undo
+        _com.inited = True
+        _com.owned = False
+        return
+    if hr < 0:
+        raise RuntimeError(f"CoInitializeEx failed: 0x{hr & 0xFFFFFFFF:08X}")
+    _com.inited = True
+    _com.owned = True
+    if threading.current_thread() is threading.main_thread():
+        atexit.register(release_com)
+
+
+def release_com():
+    if getattr(_com, "inited", False) and _com.owned:
+        CoUninitialize()
+    _com.inited = False
+
 
 class ILocation(ctypes.c_void_p):
     pass
@@ -22,58 +119,167 @@ class ILocation(ctypes.c_void_p):
 class ILocationReport(ctypes.c_void_p):
     pass
 
+
+def com_method(obj, index, *argtypes):
+    """Bind vtable slot `index` of COM pointer `obj`; the returned callable yields the HRESULT."""
+    vtbl = ctypes.cast(obj, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p)))
+    fn = ctypes.WINFUNCTYPE(ctypes.c_long, ctypes.c_void_p, *argtypes)(vtbl[0][index])
+    return lambda *args: fn(obj, *args)
+
+
+def com_release(obj):
+    """IUnknown::Release (slot 2), if obj holds an interface pointer."""
+    if obj:
+        com_method(obj, 2)()
+
+
+# -----------------------------
+# ILocationEvents sink
+# -----------------------------
+QueryInterfaceProc = ctypes.WINFUNCTYPE(ctypes.c_long, ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p))
+AddRefProc = ctypes.WINFUNCTYPE(ctypes.c_ulong, ctypes.c_void_p)
+ReleaseProc = ctypes.WINFUNCTYPE(ctypes.c_ulong, ctypes.c_void_p)
+OnLocationChangedProc = ctypes.WINFUNCTYPE(ctypes.c_long, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p)
+OnStatusChangedProc = ctypes.WINFUNCTYPE(ctypes.c_long, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int)
+
+
+class ILocationEventsVtbl(ctypes.Structure):
+    _fields_ = [
+        ("QueryInterface", QueryInterfaceProc),
+        ("AddRef", AddRefProc),
+        ("Release", ReleaseProc),
+        ("OnLocationChanged", OnLocationChangedProc),
+        ("OnStatusChanged", OnStatusChangedProc),
+    ]
+
+
+class COMObject(ctypes.Structure):
+    _fields_ = [("lpVtbl", ctypes.POINTER(ILocationEventsVtbl))]
+
+
+class LocationEvents:
+    """
+    Minimal ILocationEvents implementation. `fired` is a Win32 event that is set
+    as soon as a report arrives (got_report) or the sensor reports a status it
+    can't deliver one from (status).
+    """
+
+    def __init__(self):
+        self.fired = CreateEventW(None, True, False, None)
+        self.status = None
+        self.got_report = False
+        self._refs = 1
+        # The vtable keeps the callback thunks alive for the lifetime of this object
+        self._vtbl = ILocationEventsVtbl(
+            QueryInterfaceProc(self._query_interface),
+            AddRefProc(self._add_ref),
+            ReleaseProc(self._release),
+            OnLocationChangedProc(self._on_location_changed),
+            OnStatusChangedProc(self._on_status_changed),
+        )
+        self._obj = COMObject(ctypes.pointer(self._vtbl))
+        self.ptr = ctypes.addressof(self._obj)  # ILocationEvents*
+
+    def _query_interface(self, this, riid, ppv):
+        if ctypes.string_at(riid, 16) in _EVENTS_IIDS:
+            ppv[0] = this
+            self._add_ref(this)
+            return S_OK
+        ppv[0] = None
+        return E_NOINTERFACE
+
+    def _add_ref(self, this):
+        self._refs += 1
+        return self._refs
+
+    def _release(self, this):
+        self._refs -= 1
+        return self._refs
+
+    def _on_location_changed(self, this, report_type, report):
+        self.got_report = True
+        SetEvent(self.fired)
+        return S_OK
+
+    def _on_status_changed(self, this, report_type, status):
+        self.status = status
+        if status in REPORT_STATUS_ERRORS:
+            SetEvent(self.fired)
+        return S_OK
+
+    def wait(self, timeout_ms):
+        # In the MTA the callbacks arrive on COM worker threads; if the caller is
+        # in an STA instead, CoWaitForMultipleHandles keeps pumping COM calls.
+        idx = wintypes.DWORD()
+        handles = (wintypes.HANDLE * 1)(self.fired)
+        hr = CoWaitForMultipleHandles(0, timeout_ms, 1, handles, ctypes.byref(idx))
+        return hr == S_OK
+
+    def close(self):
+        CloseHandle(self.fired)
+
+
 def get_lat_lon():
+    ensure_com()
     loc = ILocation()
+    report = ILocationReport()
 
-    hr = ctypes.windll.ole32.CoCreateInstance(
-        ctypes.byref(CLSID_Location),
+    hr = CoCreateInstance(
+        _p_CLSID_Location,
         None,
         1,  # CLSCTX_INPROC_SERVER
-        ctypes.byref(IID_ILocation),
+        _p_IID_ILocation,
         ctypes.byref(loc)
     )
     if hr != 0:
-        raise RuntimeError(f"CoCreateInstance failed: 0x{hr:08X}")
-
-    # Request permissions implicitly (Windows handles dialog/policy)
-    ctypes.windll.ole32.CoInitialize(None)
+        raise RuntimeError(f"CoCreateInstance failed: 0x{hr & 0xFFFFFFFF:08X}")
 
-    # Get report interface
-    report = ILocationReport()
-    vtbl = ctypes.cast(loc, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p)))
+    try:
+        # ILocation: 3 RegisterForReport, 4 UnregisterForReport, 5 GetReport
+        RegisterForReport = com_method(loc, 3, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_ulong)
+        UnregisterForReport = com_method(loc, 4, ctypes.c_void_p)
+        GetReport = com_method(loc, 5, ctypes.c_void_p, ctypes.POINTER(ILocationReport))
 
-    # ILocation::GetReport
-    GetReport = ctypes.CFUNCTYPE(
-        ctypes.c_long,
-        ctypes.c_int,
-        ctypes.POINTER(ILocationReport)
-    )(vtbl[0][3])  # method index
+        # Wait for GPS fix: OnLocationChanged fires as soon as one is available
+        print("Waiting for GPS fix...")
+        events = LocationEvents()
+        registered = False
+        try:
+            hr = RegisterForReport(events.ptr, _p_IID_ILatLongReport, 0)
+            if hr != 0:
+                raise RuntimeError(f"RegisterForReport failed: 0x{hr & 0xFFFFFFFF:08X}")
+            registered = True
+            signalled = events.wait(FIX_TIMEOUT_MS)
+        finally:
+            if registered:
+                UnregisterForReport(_p_IID_ILatLongReport)
+            events.close()
 
-    # Wait for GPS fix
-    print("Waiting for GPS fix...")
-    start = time.time()
-    while time.time() - start < 15:
-        hr = GetReport(REPORT_TYPE_LATLONG, ctypes.byref(report))
-        if hr == 0 and report:
-            break
-        time.sleep(1)
+        if not events.got_report:
+            if events.status in REPORT_STATUS_ERRORS:
+                raise RuntimeError(REPORT_STATUS_ERRORS[events.status])
+            if not signalled:
+                raise RuntimeError(f"No GPS fix within {FIX_TIMEOUT_MS // 1000}s")
 
-    if not report:
-        raise RuntimeError("No GPS fix")
+        hr = GetReport(_p_IID_ILatLongReport, ctypes.byref(report))
+        if hr != 0 or not report:
+            raise RuntimeError("No GPS fix")
 
-    rtbl = ctypes.cast(report, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p)))
+        # ILatLongReport::GetLatitude / GetLongitude
+        GetLatitude = com_method(report, 6, ctypes.POINTER(ctypes.c_double))
+        GetLongitude = com_method(report, 7, ctypes.POINTER(ctypes.c_double))
 
-    # ILocationReport::GetLatitude / GetLongitude
-    GetLatitude = ctypes.CFUNCTYPE(ctypes.c_long, ctypes.POINTER(ctypes.c_double))(rtbl[0][6])
-    GetLongitude = ctypes.CFUNCTYPE(ctypes.c_long, ctypes.POINTER(ctypes.c_double))(rtbl[0][7])
+        lat = ctypes.c_double()
+        lon = ctypes.c_double()
 
-    lat = ctypes.c_double()
-    lon = ctypes.c_double()
+        GetLatitude(ctypes.byref(lat))
+        GetLongitude(ctypes.byref(lon))
 
-    GetLatitude(ctypes.byref(lat))
-    GetLongitude(ctypes.byref(lon))
+        return lat.value, lon.value
+    finally:
+        com_release(report)
+        com_release(loc)
 
-    return lat.value, lon.value
 
 if __name__ == "__main__":
     try:
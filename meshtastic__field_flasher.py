@@ -1,13 +1,17 @@
+import codecs
+import functools
 import json
 import os
+import queue
 import re
-import shutil
 import subprocess
 import threading
 import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, font
 import ctypes
+from ctypes import wintypes
+from dataclasses import dataclass
 from pathlib import Path
 import subprocess
 
@@ -29,6 +33,10 @@ STATE_PATH = APP_DIR / "state.json"
 
 KEYPAD_WIDTH = 640  # 1/3 of 1920px
 
+# One UI heartbeat services the log queue and any pending debounced work
+TICK_MS = 50
+SAVE_DEBOUNCE_S = 0.3
+
 GPS_COM_PORT = "COM8"
 GPS_BAUD = 9600
 
@@ -36,68 +44,270 @@ GPS_BAUD = 9600
 # -----------------------------
 # Modes
 # -----------------------------
-MODE_DEFS = {
-    "RAK4631": {
-        "label": "RAK4631 Router (UF2 Drive)",
-        "flash_method": "uf2_drive",
-        "firmware_default": "rak4631.uf2",
-        "gps_mode": "fixed",  # lat/lon required
-        "role": "ROUTER",
-        "owner_mode": "repeater",  # letters+2 digits, short+2 digits
-    },
-    "Heltec V3": {
-        "label": "Heltec V3 Client (No GPS)",
-        "flash_method": "esptool",
-        "firmware_default": "heltec_v3_client.bin",
-        "gps_mode": "none",
-        "role": "CLIENT",
-        "owner_mode": "user",  # name + short name (no numbers)
-    },
-    "Heltec V4": {
-        "label": "Heltec V4 Client (GPS)",
-        "flash_method": "esptool",
-        "firmware_default": "heltec_v4_gps.bin",
-        "gps_mode": "gps",
-        "role": "CLIENT",
-        "owner_mode": "user",
-    },
+@dataclass(slots=True, frozen=True)
+class Mode:
+    key: str
+    label: str
+    flash_method: str  # "uf2_drive" | "esptool"
+    firmware_default: str
+    gps_mode: str  # "fixed" (lat/lon required) | "none" | "gps"
+    role: str
+    owner_mode: str  # "repeater": letters+2 digits, short+2 digits | "user": name + short name (no numbers)
+    meshtastic_base: tuple[str, ...]  # static part of the meshtastic CLI argv
+
+
+def _static_meshtastic_cmd(role, gps_mode):
+    # Everything except owner and fixed lat/lon, which come from the UI per run
+    cmd = ["meshtastic"] + [
+        "--seturl", SETURL_VALUE,
+
+        "--set", "neighbor_info.update_interval", "600",
+        "--set", "neighbor_info.transmit_over_lora", "true",
+        "--set", "neighbor_info.enabled", "true",
+
+        "--set", "device.role", role,
+        "--set", "device.rebroadcast_mode", "ALL",
+        "--set", "lora.config_ok_to_mqtt", "true",
+    ]
+
+    if gps_mode == "fixed":
+        cmd += ["--set", "position.fixed_position", "true"]
+    else:
+        cmd += ["--set", "position.fixed_position", "false"]
+
+    if role == "CLIENT":
+        cmd += [
+            "--set", "mqtt.enabled", "true",
+            "--set", "mqtt.server", "mqtt.spp.lol",
+            "--set", "mqtt.username", "MC01",
+            "--set", "mqtt.password", "snorr702",
+            "--set", "mqtt.proxy_to_client_enabled", "true",
+            "--set", "mqtt.map_reporting_enabled", "true",
+            "--set", "mqtt.encryption_enabled", "true",
+            "--set", "mqtt.tls_enabled", "true",
+            "--set", "mqtt.root", "/msh/SNORR",
+
+            "--ch-set", "uplink_enabled", "true", "--ch-index", "0",
+            "--ch-set", "downlink_enabled", "true", "--ch-index", "0",
+            "--ch-set", "module_settings.position_precision", "32", "--ch-index", "0",
+
+            "--set", "position.broadcast_smart_minimum_distance", "10",
+            "--set", "position.broadcast_smart_minimum_interval_secs", "600",
+        ]
+    if gps_mode == "gps":
+        cmd += [
+            "--set", "position.rx_gpio", "39",
+            "--set", "position.tx_gpio", "38",
+            "--set", "position.gps_mode", "ENABLED",
+        ]
+
+    return cmd
+
+
+def _make_mode(key, label, flash_method, firmware_default, gps_mode, role, owner_mode):
+    return Mode(
+        key=key,
+        label=label,
+        flash_method=flash_method,
+        firmware_default=firmware_default,
+        gps_mode=gps_mode,
+        role=role,
+        owner_mode=owner_mode,
+        meshtastic_base=tuple(_static_meshtastic_cmd(role, gps_mode)),
+    )
+
+
+MODES = {
+    m.key: m
+    for m in (
+        _make_mode(
+            "RAK4631",
+            label="RAK4631 Router (UF2 Drive)",
+            flash_method="uf2_drive",
+            firmware_default="rak4631.uf2",
+            gps_mode="fixed",
+            role="ROUTER",
+            owner_mode="repeater",
+        ),
+        _make_mode(
+            "Heltec V3",
+            label="Heltec V3 Client (No GPS)",
+            flash_method="esptool",
+            firmware_default="heltec_v3_client.bin",
+            gps_mode="none",
+            role="CLIENT",
+            owner_mode="user",
+        ),
+        _make_mode(
+            "Heltec V4",
+            label="Heltec V4 Client (GPS)",
+            flash_method="esptool",
+            firmware_default="heltec_v4_gps.bin",
+            gps_mode="gps",
+            role="CLIENT",
+            owner_mode="user",
+        ),
+    )
 }
-MODE_KEYS = list(MODE_DEFS.keys())
+MODE_KEYS = list(MODES.keys())
 
 
 # -----------------------------
 # UF2 Drive detection (Windows)
 # -----------------------------
 DRIVE_REMOVABLE = 2
-GetDriveTypeW = ctypes.windll.kernel32.GetDriveTypeW
+UF2_INFO_FILES = ("INFO_UF2.TXT", "UF2INFO.TXT")
+_kernel32 = ctypes.windll.kernel32
+GetDriveTypeW = _kernel32.GetDriveTypeW
+GetDriveTypeW.argtypes = [wintypes.LPCWSTR]
+GetDriveTypeW.restype = wintypes.UINT
+GetLogicalDrives = _kernel32.GetLogicalDrives
+GetLogicalDrives.argtypes = []
+GetLogicalDrives.restype = wintypes.DWORD
+
+# Enumeration cache: only drive letters whose GetLogicalDrives() bit changed are re-probed.
+# Only the app's drive scanner thread enumerates, so the cache needs no lock.
+_last_bitmask = 0
+_drive_types = {}  # "D:\\" -> GetDriveTypeW result
+_cached_removable = []
 
 
 def list_removable_drives_windows():
-    drives = []
-    bitmask = ctypes.windll.kernel32.GetLogicalDrives()
+    global _last_bitmask, _cached_removable
+    bitmask = GetLogicalDrives()
+    if bitmask == _last_bitmask:
+        return list(_cached_removable)
+
+    changed = bitmask ^ _last_bitmask
     for i in range(26):
-        if bitmask & (1 << i):
+        if changed & (1 << i):
             drive = f"{chr(65 + i)}:\\"
-            dtype = GetDriveTypeW(ctypes.c_wchar_p(drive))
-            if dtype == DRIVE_REMOVABLE:
-                drives.append(drive)
-    return drives
+            if bitmask & (1 << i):
+                _drive_types[drive] = GetDriveTypeW(drive)
+            else:
+                _drive_types.pop(drive, None)
+
+    _last_bitmask = bitmask
+    _cached_removable = sorted(d for d, t in _drive_types.items() if t == DRIVE_REMOVABLE)
+    return list(_cached_removable)
+
+
+def _is_uf2_drive(drive):
+    # One directory read instead of an exists() call per info file. Not cached:
+    # a different medium can appear under the same letter between refreshes.
+    with os.scandir(drive) as it:
+        return any(e.name.upper() in UF2_INFO_FILES for e in it)
 
 
 def detect_uf2_drives():
     drives = []
     for d in list_removable_drives_windows():
         try:
-            if (
-                os.path.exists(os.path.join(d, "INFO_UF2.TXT"))
-                or os.path.exists(os.path.join(d, "UF2INFO.TXT"))
-            ):
+            if _is_uf2_drive(d):
                 drives.append(d)
         except Exception:
             pass
     return drives
 
 
+# -----------------------------
+# Volume arrival/removal notifications (Windows)
+# -----------------------------
+WM_DEVICECHANGE = 0x0219
+DBT_DEVICEARRIVAL = 0x8000
+DBT_DEVICEREMOVECOMPLETE = 0x8004
+DBT_DEVTYP_DEVICEINTERFACE = 0x00000005
+DEVICE_NOTIFY_WINDOW_HANDLE = 0x00000000
+GWLP_WNDPROC = -4
+
+# Several WM_DEVICECHANGE messages arrive per plug event; wait for them to settle.
+DRIVE_CHANGE_SETTLE_S = 0.3
+
+
+class GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", wintypes.DWORD),
+        ("Data2", wintypes.WORD),
+        ("Data3", wintypes.WORD),
+        ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+
+GUID_DEVINTERFACE_VOLUME = GUID(
+    0x53F5630D, 0xB6BF, 0x11D0, (ctypes.c_ubyte * 8)(0x94, 0xF2, 0x00, 0xA0, 0xC9, 0x1E, 0xFB, 0x8B)
+)
+
+
+class DEV_BROADCAST_DEVICEINTERFACE_W(ctypes.Structure):
+    _fields_ = [
+        ("dbcc_size", wintypes.DWORD),
+        ("dbcc_devicetype", wintypes.DWORD),
+        ("dbcc_reserved", wintypes.DWORD),
+        ("dbcc_classguid", GUID),
+        ("dbcc_name", ctypes.c_wchar * 1),
+    ]
+
+
+LRESULT = wintypes.LPARAM
+WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+_user32 = ctypes.windll.user32
+# 32-bit user32 only exports SetWindowLongW
+SetWindowLongPtrW = getattr(_user32, "SetWindowLongPtrW", _user32.SetWindowLongW)
+SetWindowLongPtrW.argtypes = [wintypes.HWND, ctypes.c_int, ctypes.c_void_p]
+SetWindowLongPtrW.restype = ctypes.c_void_p
+CallWindowProcW = _user32.CallWindowProcW
+CallWindowProcW.argtypes = [ctypes.c_void_p, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+CallWindowProcW.restype = LRESULT
+RegisterDeviceNotificationW = _user32.RegisterDeviceNotificationW
+RegisterDeviceNotificationW.argtypes = [wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD]
+RegisterDeviceNotificationW.restype = wintypes.HANDLE
+UnregisterDeviceNotification = _user32.UnregisterDeviceNotification
+UnregisterDeviceNotification.argtypes = [wintypes.HANDLE]
+UnregisterDeviceNotification.restype = wintypes.BOOL
+
+
+class VolumeChangeHook:
+    """
+    Subclass the Tk toplevel's window proc and call on_change() whenever Windows
+    reports a volume arriving or going away (e.g. a UF2 bootloader drive mounting).
+    on_change runs on the Tk thread from inside the window proc; keep it short.
+    """
+
+    def __init__(self, root: tk.Tk, on_change):
+        self.on_change = on_change
+        root.update_idletasks()  # make sure the toplevel wrapper window exists
+        self.hwnd = int(root.wm_frame(), 16)
+
+        # Keep a reference to the callback thunk for as long as it is installed
+        self._proc = WNDPROC(self._wndproc)
+        self._old_proc = SetWindowLongPtrW(self.hwnd, GWLP_WNDPROC, ctypes.cast(self._proc, ctypes.c_void_p))
+        if not self._old_proc:
+            raise ctypes.WinError()
+
+        flt = DEV_BROADCAST_DEVICEINTERFACE_W()
+        flt.dbcc_size = ctypes.sizeof(flt)
+        flt.dbcc_devicetype = DBT_DEVTYP_DEVICEINTERFACE
+        flt.dbcc_classguid = GUID_DEVINTERFACE_VOLUME
+        self._notify = RegisterDeviceNotificationW(self.hwnd, ctypes.byref(flt), DEVICE_NOTIFY_WINDOW_HANDLE)
+
+    def _wndproc(self, hwnd, msg, wparam, lparam):
+        if msg == WM_DEVICECHANGE and wparam in (DBT_DEVICEARRIVAL, DBT_DEVICEREMOVECOMPLETE):
+            try:
+                self.on_change()
+            except Exception:
+                pass
+        return CallWindowProcW(self._old_proc, hwnd, msg, wparam, lparam)
+
+    def remove(self):
+        if self._notify:
+            UnregisterDeviceNotification(self._notify)
+            self._notify = None
+        if self._old_proc:
+            SetWindowLongPtrW(self.hwnd, GWLP_WNDPROC, self._old_proc)
+            self._old_proc = None
+
+
 # -----------------------------
 # Helpers
 # -----------------------------
@@ -131,14 +341,21 @@ def show_touch_keyboard():
 def run_cmd_stream(cmd, log_fn, line_cb=None):
     """
     Stream subprocess output in near-real-time.
-    Treat '\r' as a line break so esptool progress updates are captured.
+    Output is read from the pipe in chunks and passed to log_fn as-is, including
+    '\r' so esptool progress can overwrite the current log line. line_cb (if any)
+    gets each line, treating '\r' as a line break.
     """
+    # esptool and meshtastic are Python underneath and block-buffer stdout when it is
+    # a pipe; make them flush as they print (the parent-side bufsize doesn't matter).
+    # A piped Python child on Windows also encodes stdout in the ANSI code page, and
+    # crashes on characters it can't hold; force UTF-8 to match the decoder below.
+    env = {**os.environ, "PYTHONUNBUFFERED": "1", "PYTHONIOENCODING": "utf-8"}
     if isinstance(cmd, list):
         log_fn(f"$ {' '.join(cmd)}\n")
-        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0, env=env)
     else:
         log_fn(f"$ {cmd}\n")
-        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0, shell=True)
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0, shell=True, env=env)
 
     out = p.stdout
     if out is None:
@@ -147,38 +364,74 @@ def run_cmd_stream(cmd, log_fn, line_cb=None):
             raise RuntimeError(f"Command failed (exit {rc})")
         return
 
-    buf = ""
-    while True:
-        b = out.read(1)
-        if not b:
-            break
-        ch = b.decode("utf-8", errors="replace")
-
-        if ch == "\r" or ch == "\n":
-            if buf:
+    def feed_lines(text):
+        # Hand complete lines to line_cb; return the trailing partial line
+        text = text.replace("\r", "\n")
+        cut = text.rfind("\n")
+        if cut < 0:
+            return text
+        for ln in text[:cut].split("\n"):
+            if ln:
+                try:
+                    line_cb(ln)
+                except Exception:
+                    pass
+        return text[cut + 1:]
+
+    # Blocking os.read() returns as soon as *some* data is available (up to 4 KB),
+    # so progress still arrives promptly without a per-byte read loop.
+    # The incremental decoder carries partial UTF-8 sequences across chunk boundaries;
+    # it relies on PYTHONIOENCODING above, or Windows children send cp1252 bytes.
+    fd = out.fileno()
+    dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+    last_ch = ""
+    with out:
+        while True:
+            data = os.read(fd, 4096)
+            text = dec.decode(data, final=not data)
+            if text:
+                log_fn(text)
+                last_ch = text[-1]
                 if line_cb:
-                    try:
-                        line_cb(buf)
-                    except Exception:
-                        pass
-                log_fn(buf + "\n")
-                buf = ""
-        else:
-            buf += ch
+                    partial = feed_lines(partial + text)
+            if not data:
+                break
 
-    if buf:
-        if line_cb:
-            try:
-                line_cb(buf)
-            except Exception:
-                pass
-        log_fn(buf + "\n")
+    if line_cb and partial:
+        try:
+            line_cb(partial)
+        except Exception:
+            pass
+    if last_ch and last_ch != "\n":
+        log_fn("\n")
 
     rc = p.wait()
     if rc != 0:
         raise RuntimeError(f"Command failed (exit {rc})")
 
 
+PROGRESS_CONTINUE = 0
+
+LPPROGRESS_ROUTINE = ctypes.WINFUNCTYPE(
+    wintypes.DWORD,
+    wintypes.LARGE_INTEGER,  # TotalFileSize
+    wintypes.LARGE_INTEGER,  # TotalBytesTransferred
+    wintypes.LARGE_INTEGER,  # StreamSize
+    wintypes.LARGE_INTEGER,  # StreamBytesTransferred
+    wintypes.DWORD,  # dwStreamNumber
+    wintypes.DWORD,  # dwCallbackReason
+    wintypes.HANDLE,  # hSourceFile
+    wintypes.HANDLE,  # hDestinationFile
+    wintypes.LPVOID,  # lpData
+)
+CopyFileExW = _kernel32.CopyFileExW
+CopyFileExW.argtypes = [
+    wintypes.LPCWSTR, wintypes.LPCWSTR, LPPROGRESS_ROUTINE, wintypes.LPVOID, ctypes.POINTER(wintypes.BOOL), wintypes.DWORD,
+]
+CopyFileExW.restype = wintypes.BOOL
+
+
 def copy_uf2_to_drive(uf2_path, drive_root, log_fn):
     if not os.path.isfile(uf2_path):
         raise RuntimeError("Firmware file not found.")
@@ -189,8 +442,24 @@ def copy_uf2_to_drive(uf2_path, drive_root, log_fn):
 
     dest = os.path.join(drive_root, os.path.basename(uf2_path))
     log_fn(f"Copying UF2 to {dest}\n")
-    shutil.copyfile(uf2_path, dest)
-    log_fn("Copy complete. Device may reboot.\n")
+
+    last_pct = -1
+
+    def progress(total, done, *_):
+        nonlocal last_pct
+        if total > 0:
+            pct = done * 100 // total
+            if pct != last_pct:
+                last_pct = pct
+                # '\r' rewrites the progress line in place in the log
+                log_fn(f"\rCopy: {pct}%")
+        return PROGRESS_CONTINUE
+
+    # Native copy path; the callback reference must outlive the call
+    cb = LPPROGRESS_ROUTINE(progress)
+    if not CopyFileExW(uf2_path, dest, cb, None, None, 0):
+        raise ctypes.WinError()
+    log_fn("\nCopy complete. Device may reboot.\n")
 
 
 def wait_seconds(sec, log_fn):
@@ -331,6 +600,20 @@ class GpsReader(threading.Thread):
         self.status.last_update = time.time()
 
 
+# -----------------------------
+# Touch fields
+# -----------------------------
+# Focus/click handling for every registered input field is bound once on this
+# bind tag (root.bind_class) instead of per widget; _register_field adds the tag.
+TOUCH_FIELD_TAG = "TouchField"
+
+
+def add_touch_bindtag(w):
+    tags = w.bindtags()
+    if TOUCH_FIELD_TAG not in tags:
+        w.bindtags(tags[:1] + (TOUCH_FIELD_TAG,) + tags[1:])
+
+
 # -----------------------------
 # App
 # -----------------------------
@@ -364,6 +647,9 @@ class App:
 
         # Vars
         self.mode = tk.StringVar(value=MODE_KEYS[0])
+        # Selected mode cached as plain attributes (StringVar.get() goes through Tcl); refreshed in apply_mode
+        self._mode = MODE_KEYS[0]
+        self._mode_def = MODES[self._mode]
 
         # Firmware: store full path, show only filename
         self.firmware_path = tk.StringVar(value="")
@@ -396,20 +682,54 @@ class App:
         # Focus/tab + persistence
         self.active_widget = None
         self.field_widgets = []
-        self._save_after_id = None
+        self._field_index = {}  # widget -> position in field_widgets
+        self._save_dirty_at = None  # time.monotonic() deadline for the debounced save
+        self._drive_refresh_at = None  # same, for a drive refresh after a volume change
         self._state = self._load_state()
 
+        # state.json is written by a background thread; skip writes when nothing changed
+        self._last_save_hash = None
+        self._save_q = queue.SimpleQueue()
+        self._save_thread = threading.Thread(target=self._state_writer, daemon=True)
+        self._save_thread.start()
+
+        # Log output from worker threads; drained into the Text widget on the Tk thread
+        self._log_q = queue.SimpleQueue()
+        self._log_cr = False  # a '\r' was seen: the next text replaces the last log line
+
+        # Flash/Configure/Erase run one at a time on a single long-lived worker; it reports
+        # progress and errors through _job_ui, which _tick applies on the Tk thread
+        self._jobs = queue.Queue()
+        self._job_ui = queue.SimpleQueue()
+        threading.Thread(target=self._job_runner, daemon=True).start()
+
+        # UF2 drive enumeration can stall on slow USB buses: one scanner thread, woken per
+        # request (taps that arrive mid-scan coalesce), results handed to _tick via a queue
+        self._drive_scan_req = queue.SimpleQueue()
+        self._drive_results = queue.SimpleQueue()
+        threading.Thread(target=self._drive_scanner, daemon=True).start()
+
         # UI
+        root.bind_class(TOUCH_FIELD_TAG, "<FocusIn>", self._on_widget_focus_ev)
+        root.bind_class(TOUCH_FIELD_TAG, "<Button-1>", self._on_field_click_ev)
         self._build_ui()
         self._wire_traces()
+        self._tick()
 
         # Restore last mode
         last_mode = self._state.get("last_mode")
-        if last_mode in MODE_DEFS:
+        if last_mode in MODES:
             self.mode.set(last_mode)
 
         self.apply_mode()
 
+        # Refresh UF2 drives as soon as Windows reports a volume change (Refresh stays as a fallback)
+        try:
+            self._drive_hook = VolumeChangeHook(self.root, self._on_volume_change)
+        except Exception as e:
+            self._drive_hook = None
+            self.log_write(f"Drive change notifications unavailable ({e}). Use Refresh.\n")
+
         # Start GPS polling + UI updates
         self._gps_thread.start()
         self._tick_gps_ui()
@@ -429,20 +749,14 @@ class App:
         return {}
 
     def _schedule_save(self):
-        if self._save_after_id is not None:
-            try:
-                self.root.after_cancel(self._save_after_id)
-            except Exception:
-                pass
-        self._save_after_id = self.root.after(300, self._save_state)
+        # Picked up by _tick once typing pauses
+        self._save_dirty_at = time.monotonic() + SAVE_DEBOUNCE_S
 
     def _save_state(self):
-        self._save_after_id = None
+        self._save_dirty_at = None
         st = self._state if isinstance(self._state, dict) else {}
-        mode = self.mode.get()
-        st["last_mode"] = mode
-        st.setdefault("modes", {})
-        st["modes"][mode] = {
+        mode = self._mode
+        entry = {
             "firmware_path": self.firmware_path.get(),
 
             "uf2_drive": self.uf2_drive.get(),
@@ -460,10 +774,31 @@ class App:
             "lon": self.lon.get(),
 
         }
-        try:
-            STATE_PATH.write_text(json.dumps(st, indent=2), encoding="utf-8")
-        except Exception:
-            pass
+        h = hash((mode, frozenset(entry.items())))
+        if h == self._last_save_hash:
+            return
+        self._last_save_hash = h
+
+        st["last_mode"] = mode
+        st.setdefault("modes", {})
+        st["modes"][mode] = entry
+
+        # Hand the writer a snapshot; the per-mode dicts only hold strings
+        snap = dict(st)
+        snap["modes"] = {k: dict(v) for k, v in st["modes"].items()}
+        self._save_q.put(snap)
+
+    def _state_writer(self):
+        while True:
+            st = self._save_q.get()
+            if st is None:
+                return
+            try:
+                tmp = STATE_PATH.with_suffix(".tmp")
+                tmp.write_bytes(json.dumps(st, separators=(",", ":")).encode("utf-8"))
+                os.replace(tmp, STATE_PATH)
+            except Exception:
+                pass
 
     # -----------------------------
     # Focus / tab helpers
@@ -476,32 +811,30 @@ class App:
         except Exception:
             pass
 
+    def _on_widget_focus_ev(self, ev):
+        self._on_widget_focus(ev.widget)
+
+    def _on_field_click_ev(self, ev):
+        # Plain entries take focus on tap; the Combobox handles its own clicks
+        if not isinstance(ev.widget, ttk.Combobox):
+            ev.widget.focus_set()
+
     def _register_field(self, w):
+        self._field_index[w] = len(self.field_widgets)
         self.field_widgets.append(w)
-        try:
-            w.bind("<FocusIn>", lambda ev, ww=w: self._on_widget_focus(ww))
-        except Exception:
-            pass
+        add_touch_bindtag(w)
         return w
 
     def _focus_next(self):
         if not self.field_widgets:
             return
-        w = self.root.focus_get()
-        try:
-            idx = self.field_widgets.index(w)
-        except Exception:
-            idx = -1
+        idx = self._field_index.get(self.root.focus_get(), -1)
         self.field_widgets[(idx + 1) % len(self.field_widgets)].focus_set()
 
     def _focus_prev(self):
         if not self.field_widgets:
             return
-        w = self.root.focus_get()
-        try:
-            idx = self.field_widgets.index(w)
-        except Exception:
-            idx = 0
+        idx = self._field_index.get(self.root.focus_get(), 0)
         self.field_widgets[(idx - 1) % len(self.field_widgets)].focus_set()
 
     # -----------------------------
@@ -512,29 +845,28 @@ class App:
         if w is None or not isinstance(w, tk.Entry):
             return
 
-        if ch == "⌫":
-            try:
-                sel_first = w.index("sel.first")
-                sel_last = w.index("sel.last")
-                w.delete(sel_first, sel_last)
-            except Exception:
-                idx = w.index(tk.INSERT)
-                if idx > 0:
-                    w.delete(idx - 1, idx)
-            return
-
-        if ch == "CLR":
-            show_touch_keyboard()
-            w.delete(0, "end")
-            return
-
+        fn = self._kp_actions.get(ch)
+        if fn is None:
+            w.insert(tk.INSERT, ch)
+        else:
+            fn(w)
 
-        if ch == "KBRD":
-            show_touch_keyboard()
-            return
+    def _kp_backspace(self, w):
+        try:
+            sel_first = w.index("sel.first")
+            sel_last = w.index("sel.last")
+            w.delete(sel_first, sel_last)
+        except Exception:
+            idx = w.index(tk.INSERT)
+            if idx > 0:
+                w.delete(idx - 1, idx)
 
+    def _kp_clear(self, w):
+        show_touch_keyboard()
+        w.delete(0, "end")
 
-        w.insert(tk.INSERT, ch)
+    def _kp_keyboard(self, w):
+        show_touch_keyboard()
 
     def _increment_owner_number(self):
         # Only meaningful for RAK
@@ -589,29 +921,39 @@ class App:
         txt = f"{pct:.0f}%"
         c.create_text(pad + bw // 2, pad + bh // 2, text=txt, font=self.touch_font, fill="#1a1a1a")
 
+    # The progress helpers are called from the job worker: they only queue the
+    # update, _drain_job_ui applies it on the Tk thread.
     def _progress_show(self, text=""):
-        def ui():
-            self._prog_pct = 0.0
-            self.prog_lbl.config(text=text)
-            self.prog_row.grid()
-            self._draw_progress()
-        self.root.after(0, ui)
+        self._job_ui.put(("show", 0.0, text))
 
     def _progress_hide(self):
-        def ui():
-            self.prog_row.grid_remove()
-            self._prog_pct = 0.0
-            self.prog_lbl.config(text="")
-            self._draw_progress()
-        self.root.after(0, ui)
+        self._job_ui.put(("hide", 0.0, ""))
 
     def _progress_set(self, pct: float, text: str = ""):
-        def ui():
-            self._prog_pct = max(0.0, min(100.0, float(pct)))
-            if text:
+        self._job_ui.put(("progress", max(0.0, min(100.0, float(pct))), text))
+
+    def _drain_job_ui(self):
+        redraw = False
+        while True:
+            try:
+                kind, pct, text = self._job_ui.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "error":
+                self._report_error(text)
+                continue
+            self._prog_pct = pct
+            if kind == "show":
                 self.prog_lbl.config(text=text)
+                self.prog_row.grid()
+            elif kind == "hide":
+                self.prog_row.grid_remove()
+                self.prog_lbl.config(text="")
+            elif text:
+                self.prog_lbl.config(text=text)
+            redraw = True
+        if redraw:
             self._draw_progress()
-        self.root.after(0, ui)
 
     def _try_parse_esptool_progress(self, line: str):
         # Writing at 0x00047e18 [=> ]   7.6% 98304/1297264 bytes...
@@ -646,8 +988,6 @@ class App:
             # highlightbackground="#bdbdbd",
             # highlightcolor="#4a90e2",
         )
-        e.bind("<Button-1>", lambda ev: e.focus_set())
-        e.bind("<FocusIn>", lambda ev, w=e: self._on_widget_focus(w))
         return e
 
     def _build_keypad(self, parent):
@@ -661,13 +1001,20 @@ class App:
             ["⌫", "CLR", "KBRD"],
         ]
 
+        # Special keys; anything else is inserted literally
+        self._kp_actions = {
+            "⌫": self._kp_backspace,
+            "CLR": self._kp_clear,
+            "KBRD": self._kp_keyboard,
+        }
+
         for r, row in enumerate(keys):
             for c, k in enumerate(row):
                 ttk.Button(
                     kp,
                     text=k,
                     style="Keypad.TButton",
-                    command=lambda kk=k: self._keypad_insert(kk),
+                    command=functools.partial(self._keypad_insert, k),
                     width=3,
                     takefocus=0
                 ).grid(row=r, column=c, padx=6, pady=6, sticky="nsew")
@@ -740,7 +1087,7 @@ class App:
                 width=10,
                 relief="raised",
                 bd=2,
-                command=lambda kk=key: set_mode(kk),
+                command=functools.partial(set_mode, key),
                 padx=12,
                 pady=12,
             )
@@ -893,13 +1240,16 @@ class App:
 
             self.lat, self.lon,
         ]:
-            v.trace_add("write", lambda *_: self._schedule_save())
+            v.trace_add("write", self._on_any_var_write)
+
+    def _on_any_var_write(self, *_):
+        self._schedule_save()
 
     # -----------------------------
     # Mode logic
     # -----------------------------
     def _update_mode_button_styles(self):
-        selected = self.mode.get()
+        selected = self._mode
         for key, btn in self.mode_buttons.items():
             if key == selected:
                 btn.configure(
@@ -920,9 +1270,11 @@ class App:
 
     def apply_mode(self):
         mode = self.mode.get()
-        if mode not in MODE_DEFS:
+        if mode not in MODES:
             return
-        d = MODE_DEFS[mode]
+        d = MODES[mode]
+        self._mode = mode
+        self._mode_def = d
         self._update_mode_button_styles()
 
         saved = (self._state.get("modes") or {}).get(mode, {})
@@ -930,7 +1282,7 @@ class App:
 
 
         # firmware
-        fw_saved = saved.get("firmware_path") or d["firmware_default"]
+        fw_saved = saved.get("firmware_path") or d.firmware_default
         fw_saved = resolve_firmware_path(fw_saved)
         self._set_firmware_path(fw_saved)
 
@@ -951,14 +1303,14 @@ class App:
         self.lon.set(saved.get("lon") or self.lon.get())
 
         # UF2 row only for RAK
-        if d["flash_method"] == "uf2_drive":
+        if d.flash_method == "uf2_drive":
             self.uf2_row.grid()
             self.refresh_drives()
         else:
             self.uf2_row.grid_remove()
 
         # owner mode show/hide + keypad ++ show/hide
-        if d["owner_mode"] == "repeater":
+        if d.owner_mode == "repeater":
             self.owner_user_row.grid_remove()
             self.owner_repeater_row.grid()
             self.inc_btn.state(["!disabled"])
@@ -973,7 +1325,7 @@ class App:
                 pass
 
         # gps behavior for device
-        if d["gps_mode"] == "fixed":
+        if d.gps_mode == "fixed":
             self.lat_entry.configure(state="normal")
             self.lon_entry.configure(state="normal")
         else:
@@ -981,7 +1333,7 @@ class App:
             self.lon_entry.configure(state="disabled")
 
         # Erase only for Heltecs (esptool)
-        if d["flash_method"] == "esptool":
+        if d.flash_method == "esptool":
             if not self.erase_btn.winfo_ismapped():
                 self.erase_btn.pack(side="left", padx=6, pady=6)
         else:
@@ -989,14 +1341,14 @@ class App:
                 self.erase_btn.pack_forget()
         
         # Baud field only for Heltecs
-        if d["flash_method"] == "esptool":
+        if d.flash_method == "esptool":
             self.baud_entry.configure(state="normal")
         else:
             self.baud_entry.configure(state="disabled")
 
 
         # Set GPS button: only meaningful when mode needs fixed coords (RAK)
-        if d["gps_mode"] == "fixed":
+        if d.gps_mode == "fixed":
             # enabled only when laptop has fix; handled in gps tick as well
             pass
         else:
@@ -1038,8 +1390,7 @@ class App:
                     self.gps_status_lbl.configure(foreground="#777777")
 
                 # enable/disable Set GPS based on current mode + fix
-                mode = self.mode.get()
-                if mode in MODE_DEFS and MODE_DEFS[mode]["gps_mode"] == "fixed" and st.has_fix:
+                if self._mode_def.gps_mode == "fixed" and st.has_fix:
                     self.set_gps_btn.state(["!disabled"])
                 else:
                     self.set_gps_btn.state(["disabled"])
@@ -1058,27 +1409,46 @@ class App:
     # -----------------------------
     # Owner building + validation
     # -----------------------------
-    def _build_owner_strings(self):
-        mode = self.mode.get()
-        d = MODE_DEFS[mode]
-
-        if d["owner_mode"] == "repeater":
-            letters = self.owner_letters.get().strip()
-            num = self.owner_num.get().strip().zfill(2)[:2]
-            short_letters = self.owner_short_letters.get().strip()
-            short_num = self.owner_short_num.get().strip().zfill(2)[:2]
-            owner = f"{letters}{num}"
-            owner_short = f"{short_letters}{short_num}"
+    def _read_owner_fields(self):
+        # One pass over the owner/position StringVars, stripped
+        d = self._mode_def
+        cfg = {}
+
+        if d.owner_mode == "repeater":
+            cfg["owner_letters"] = self.owner_letters.get().strip()
+            cfg["owner_num"] = self.owner_num.get().strip()
+            cfg["owner_short_letters"] = self.owner_short_letters.get().strip()
+            cfg["owner_short_num"] = self.owner_short_num.get().strip()
+        else:
+            cfg["user_owner"] = self.user_owner.get().strip()
+            cfg["user_owner_short"] = self.user_owner_short.get().strip()
+
+        if d.gps_mode == "fixed":
+            cfg["lat"] = self.lat.get().strip()
+            cfg["lon"] = self.lon.get().strip()
+
+        return cfg
+
+    def _build_owner_strings(self, cfg):
+        d = self._mode_def
+
+        if d.owner_mode == "repeater":
+            num = cfg["owner_num"].zfill(2)[:2]
+            short_num = cfg["owner_short_num"].zfill(2)[:2]
+            owner = f"{cfg['owner_letters']}{num}"
+            owner_short = f"{cfg['owner_short_letters']}{short_num}"
             return owner, owner_short
 
         # user mode
-        owner = self.user_owner.get().strip()
-        owner_short = self.user_owner_short.get().strip()
-        return owner, owner_short
+        return cfg["user_owner"], cfg["user_owner_short"]
 
     def _validate_common(self):
-        mode = self.mode.get()
-        d = MODE_DEFS[mode]
+        """
+        Validate the current fields and return them as a dict (stripped owner
+        fields, lat/lon for fixed modes, plus the built owner/owner_short and the
+        mode/firmware/drive/baud the job runs with). Tk thread only.
+        """
+        d = self._mode_def
 
         fw_full = resolve_firmware_path(self.firmware_path.get())
         if not fw_full or not os.path.isfile(fw_full):
@@ -1087,91 +1457,61 @@ class App:
         self.firmware_path.set(fw_full)
         self.firmware_display.set(os.path.basename(fw_full))
 
-        if d["flash_method"] == "uf2_drive":
-            if not self.uf2_drive.get().strip():
+        drive = self.uf2_drive.get().strip()
+        if d.flash_method == "uf2_drive":
+            if not drive:
                 raise RuntimeError("Select/detect the UF2 drive.")
             
-        if d["flash_method"] == "esptool":
-            b = (self.esptool_baud.get().strip() or "115200")
+        b = (self.esptool_baud.get().strip() or "115200")
+        if d.flash_method == "esptool":
             if not b.isdigit():
                 raise RuntimeError("Baud must be a number (e.g. 115200).")
 
 
-        owner, owner_short = self._build_owner_strings()
+        cfg = self._read_owner_fields()
+        cfg["mode"] = d
+        cfg["firmware"] = fw_full
+        cfg["uf2_drive"] = drive
+        cfg["baud"] = b
+        owner, owner_short = self._build_owner_strings(cfg)
         if not owner:
             raise RuntimeError("Owner required.")
         if not owner_short:
             raise RuntimeError("Owner short required.")
+        cfg["owner"] = owner
+        cfg["owner_short"] = owner_short
 
-        if d["owner_mode"] == "repeater":
+        if d.owner_mode == "repeater":
             # require 2-digit numbers
-            if not self.owner_num.get().strip().isdigit() or len(self.owner_num.get().strip()) > 2:
+            if not cfg["owner_num"].isdigit() or len(cfg["owner_num"]) > 2:
                 raise RuntimeError("Owner number must be 2 digits (e.g. 01).")
-            if not self.owner_short_num.get().strip().isdigit() or len(self.owner_short_num.get().strip()) > 2:
+            if not cfg["owner_short_num"].isdigit() or len(cfg["owner_short_num"]) > 2:
                 raise RuntimeError("Owner short number must be 2 digits (e.g. 01).")
 
-        if d["gps_mode"] == "fixed":
+        if d.gps_mode == "fixed":
             try:
-                float(self.lat.get().strip())
-                float(self.lon.get().strip())
+                float(cfg["lat"])
+                float(cfg["lon"])
             except ValueError:
                 raise RuntimeError("Latitude/Longitude must be valid numbers for fixed position mode.")
 
+        return cfg
+
     # -----------------------------
     # Meshtastic config
     # -----------------------------
-    def _meshtastic_config_cmd(self):
-        mode = self.mode.get()
-        d = MODE_DEFS[mode]
-        owner, owner_short = self._build_owner_strings()
-
-        cmd = ["meshtastic"] + [
-            "--seturl", SETURL_VALUE,
-            "--set-owner", owner,
-            "--set-owner-short", owner_short,
+    def _meshtastic_config_cmd(self, cfg):
+        d = cfg["mode"]
 
-            "--set", "neighbor_info.update_interval", "600",
-            "--set", "neighbor_info.transmit_over_lora", "true",
-            "--set", "neighbor_info.enabled", "true",
-
-            "--set", "device.role", d["role"],
-            "--set", "device.rebroadcast_mode", "ALL",
-            "--set", "lora.config_ok_to_mqtt", "true",
+        cmd = list(d.meshtastic_base) + [
+            "--set-owner", cfg["owner"],
+            "--set-owner-short", cfg["owner_short"],
         ]
 
-        if d["gps_mode"] == "fixed":
+        if d.gps_mode == "fixed":
             cmd += [
-                "--set", "position.fixed_position", "true",
-                "--setlat", self.lat.get().strip(),
-                "--setlon", self.lon.get().strip(),
-            ]
-        else:
-            cmd += ["--set", "position.fixed_position", "false"]
-
-        if d["role"] == "CLIENT":
-            cmd += [
-                "--set", "mqtt.enabled", "true",
-                "--set", "mqtt.server", "mqtt.spp.lol",
-                "--set", "mqtt.username", "MC01",
-                "--set", "mqtt.password", "snorr702",
-                "--set", "mqtt.proxy_to_client_enabled", "true",
-                "--set", "mqtt.map_reporting_enabled", "true",
-                "--set", "mqtt.encryption_enabled", "true",
-                "--set", "mqtt.tls_enabled", "true",
-                "--set", "mqtt.root", "/msh/SNORR",
-
-                "--ch-set", "uplink_enabled", "true", "--ch-index", "0",
-                "--ch-set", "downlink_enabled", "true", "--ch-index", "0",
-                "--ch-set", "module_settings.position_precision", "32", "--ch-index", "0",
-
-                "--set", "position.broadcast_smart_minimum_distance", "10",
-                "--set", "position.broadcast_smart_minimum_interval_secs", "600",
-            ]
-        if d["gps_mode"] == "gps":
-            cmd += [
-                "--set", "position.rx_gpio", "39",
-                "--set", "position.tx_gpio", "38",
-                "--set", "position.gps_mode", "ENABLED",
+                "--setlat", cfg["lat"],
+                "--setlon", cfg["lon"],
             ]
 
         return cmd
@@ -1179,14 +1519,13 @@ class App:
     # -----------------------------
     # Flash / Erase / Configure
     # -----------------------------
-    def _do_flash(self):
-        mode = self.mode.get()
-        d = MODE_DEFS[mode]
-        fw = resolve_firmware_path(self.firmware_path.get().strip())
+    def _do_flash(self, cfg):
+        d = cfg["mode"]
+        fw = cfg["firmware"]
 
-        if d["flash_method"] == "uf2_drive":
+        if d.flash_method == "uf2_drive":
             self.log_write("Flashing (UF2 copy)...\n")
-            copy_uf2_to_drive(fw, self.uf2_drive.get().strip(), self.log_write)
+            copy_uf2_to_drive(fw, cfg["uf2_drive"], self.log_write)
             wait_seconds(8, self.log_write)
             self.log_write("Flash done.\n")
             return
@@ -1195,8 +1534,7 @@ class App:
         self._progress_show("Flashing…")
         try:
             self.log_write("Flashing (esptool)...\n")
-            baud = self.esptool_baud.get().strip() or "115200"
-            cmd = ["esptool", "--baud", baud, "write-flash", "0x00", fw]
+            cmd = ["esptool", "--baud", cfg["baud"], "write-flash", "0x00", fw]
 
             run_cmd_stream(cmd, self.log_write, line_cb=self._try_parse_esptool_progress)
             self._progress_set(100.0, "Done")
@@ -1204,62 +1542,82 @@ class App:
         finally:
             self._progress_hide()
 
-    def _do_erase(self):
+    def _do_erase(self, cfg):
         self._progress_show("Erasing…")
         try:
             self.log_write("Erasing flash (esptool erase-flash)...\n")
-            baud = self.esptool_baud.get().strip() or "115200"
-            run_cmd_stream(["esptool", "--baud", baud, "erase-flash"], self.log_write)
+            run_cmd_stream(["esptool", "--baud", cfg["baud"], "erase-flash"], self.log_write)
 
             self._progress_set(100.0, "Done")
             self.log_write("Erase complete.\n")
         finally:
             self._progress_hide()
 
-    def _do_configure(self):
+    def _do_configure(self, cfg):
         # If configuring RAK and you want to auto-fill lat/lon from laptop GPS *only when fix exists*,
         # you already have Set GPS button. Keeping configure deterministic (uses whatever is in fields).
         self.log_write("Configuring via Meshtastic CLI...\n")
-        run_cmd_stream(self._meshtastic_config_cmd(), self.log_write)
+        run_cmd_stream(self._meshtastic_config_cmd(cfg), self.log_write)
         self.log_write("Configuration complete.\n")
 
     # -----------------------------
     # Buttons (threaded)
     # -----------------------------
     def flash_only(self):
-        def worker():
-            try:
-                self._validate_common()
-                self.log_write(f"Mode: {MODE_DEFS[self.mode.get()]['label']}\n")
-                self._do_flash()
-            except Exception as e:
-                self.log_write(f"\nERROR: {e}\n")
-                messagebox.showerror("Error", str(e))
-        threading.Thread(target=worker, daemon=True).start()
+        self._submit_job(self._flash_job, self._validate_common)
 
     def configure_only(self):
-        def worker():
-            try:
-                self._validate_common()
-                self.log_write(f"Mode: {MODE_DEFS[self.mode.get()]['label']}\n")
-                self._do_configure()
-            except Exception as e:
-                self.log_write(f"\nERROR: {e}\n")
-                messagebox.showerror("Error", str(e))
-        threading.Thread(target=worker, daemon=True).start()
+        self._submit_job(self._configure_job, self._validate_common)
 
     def erase_flash(self):
-        def worker():
+        self._submit_job(self._erase_job, self._validate_erase)
+
+    def _submit_job(self, job, prepare):
+        # One operation at a time; taps while one is pending/running are ignored.
+        # prepare() reads/validates the Tk variables here, so the worker never touches Tk.
+        if self._jobs.unfinished_tasks:
+            self.log_write("Busy: wait for the current operation to finish.\n")
+            return
+        try:
+            cfg = prepare()
+        except RuntimeError as e:
+            self._report_error(str(e))
+            return
+        self._jobs.put(functools.partial(job, cfg))
+
+    def _job_runner(self):
+        while True:
+            job = self._jobs.get()
             try:
-                mode = self.mode.get()
-                if MODE_DEFS[mode]["flash_method"] != "esptool":
-                    raise RuntimeError("Erase is only available for Heltec modes.")
-                self.log_write(f"Mode: {MODE_DEFS[self.mode.get()]['label']}\n")
-                self._do_erase()
+                job()
             except Exception as e:
-                self.log_write(f"\nERROR: {e}\n")
-                messagebox.showerror("Error", str(e))
-        threading.Thread(target=worker, daemon=True).start()
+                self._job_ui.put(("error", 0.0, str(e)))
+            finally:
+                self._jobs.task_done()
+
+    def _report_error(self, msg):
+        # Tk thread only. The dialog runs its own event loop, so open it from an idle
+        # callback rather than inside _tick.
+        self.log_write(f"\nERROR: {msg}\n")
+        self.root.after_idle(messagebox.showerror, "Error", msg)
+
+    def _validate_erase(self):
+        d = self._mode_def
+        if d.flash_method != "esptool":
+            raise RuntimeError("Erase is only available for Heltec modes.")
+        return {"mode": d, "baud": self.esptool_baud.get().strip() or "115200"}
+
+    def _flash_job(self, cfg):
+        self.log_write(f"Mode: {cfg['mode'].label}\n")
+        self._do_flash(cfg)
+
+    def _configure_job(self, cfg):
+        self.log_write(f"Mode: {cfg['mode'].label}\n")
+        self._do_configure(cfg)
+
+    def _erase_job(self, cfg):
+        self.log_write(f"Mode: {cfg['mode'].label}\n")
+        self._do_erase(cfg)
 
     # -----------------------------
     # Misc UI actions
@@ -1269,26 +1627,117 @@ class App:
         if p:
             self._set_firmware_path(p)
 
-    def refresh_drives(self):
-        drives = detect_uf2_drives()
+    def refresh_drives(self, log_empty=True):
+        # log_empty=False for automatic refreshes: an unplugged drive shouldn't nag
+        self._drive_scan_req.put(log_empty)
+
+    def _drive_scanner(self):
+        while True:
+            log_empty = self._drive_scan_req.get()
+            while True:
+                try:
+                    log_empty |= self._drive_scan_req.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                drives = detect_uf2_drives()
+            except Exception as e:
+                self.log_write(f"Drive scan failed: {e}\n")
+                continue
+            self._drive_results.put((drives, log_empty))
+
+    def _drain_drive_results(self):
+        result = None
+        log_empty = False
+        while True:
+            try:
+                result = self._drive_results.get_nowait()
+            except queue.Empty:
+                break
+            log_empty |= result[1]
+        if result is not None:
+            self._apply_drive_list(result[0], log_empty)
+
+    def _apply_drive_list(self, drives, log_empty=True):
+        # A scan can finish after the user has switched away from the UF2 mode
+        if self._mode_def.flash_method != "uf2_drive":
+            return
         self.drive_combo["values"] = drives
-        if drives and not self.uf2_drive.get():
-            self.uf2_drive.set(drives[0])
-        if not drives:
-            self.uf2_drive.set("")
+        if self.uf2_drive.get() not in drives:
+            self.uf2_drive.set(drives[0] if drives else "")
+        if not drives and log_empty:
             self.log_write("No UF2 drives detected. Put device in UF2 boot mode and click Refresh.\n")
 
+    def _on_volume_change(self):
+        # Runs inside the window proc: just note it, _tick does the refresh
+        if self._drive_refresh_at is None:
+            self._drive_refresh_at = time.monotonic() + DRIVE_CHANGE_SETTLE_S
+
+    def _refresh_drives_on_change(self):
+        self._drive_refresh_at = None
+        if self._mode_def.flash_method == "uf2_drive":
+            self.refresh_drives(log_empty=False)
+
     def log_write(self, s):
-        self.log.insert("end", s)
-        self.log.see("end")
-        self.root.update_idletasks()
+        # Safe to call from any thread; the Tk thread picks it up in _drain_log.
+        self._log_q.put(s)
+
+    def _drain_log(self):
+        parts = []
+        while True:
+            try:
+                parts.append(self._log_q.get_nowait())
+            except queue.Empty:
+                break
+        if parts:
+            self._log_append("".join(parts))
+            self.log.see("end")
+
+    def _log_append(self, s):
+        # Terminal-style '\r': the text after it overwrites the current (last) line,
+        # so esptool progress updates in place instead of adding a line per update.
+        log = self.log
+        for i, part in enumerate(s.split("\r")):
+            if i:
+                self._log_cr = True
+            if not part:
+                continue
+            if self._log_cr and part[0] != "\n":
+                log.delete("end -1c linestart", "end -1c")
+            self._log_cr = False
+            log.insert("end", part)
+
+    def _tick(self):
+        try:
+            if not self._log_q.empty():
+                self._drain_log()
+            if not self._drive_results.empty():
+                self._drain_drive_results()
+            if not self._job_ui.empty():
+                self._drain_job_ui()
+
+            now = time.monotonic()
+            if self._save_dirty_at is not None and now >= self._save_dirty_at:
+                self._save_state()
+            if self._drive_refresh_at is not None and now >= self._drive_refresh_at:
+                self._refresh_drives_on_change()
+        finally:
+            self.root.after(TICK_MS, self._tick)
 
     def clear_log(self):
         self.log.delete("1.0", "end")
+        self._log_cr = False
 
     def _exit_app(self):
         try:
             self._save_state()
+            self._save_q.put(None)
+            self._save_thread.join(timeout=2.0)
+        except Exception:
+            pass
+        try:
+            if self._drive_hook is not None:
+                self._drive_hook.remove()
         except Exception:
             pass
         try: